@@ -0,0 +1,150 @@
+import queue
+import threading
+
+import numpy as np
+
+
+class AudioRecorder:
+    """
+    Records mono audio into a single preallocated float32 buffer.
+
+    Incoming chunks are copied in place, so recording does no per-frame
+    allocations and memory never grows past `max_duration` seconds. Samples
+    arriving once the buffer is full are dropped and counted in `dropped`.
+
+    If `segment_duration` and `on_segment` are given, every completed segment
+    is handed to `on_segment` on a background thread while recording
+    continues, and the remaining tail is handed over by `stop()`. Segments
+    are cut at the quietest point in the last `split_window` seconds before
+    each boundary, so words are not split between two segments.
+
+    Writes are only accepted between `start()` and `stop()`.
+
+    Args:
+        samplerate (int): Sample rate of the incoming audio.
+        max_duration (float): Maximum recording length in seconds.
+        segment_duration (float | None): Length of live segments in seconds.
+        on_segment (callable | None): Called with each float32 segment.
+        split_window (float): Seconds searched for a quiet cut point.
+    """
+
+    def __init__(self, samplerate=16000, max_duration=300, segment_duration=None, on_segment=None,
+                 split_window=1.0):
+        self.samplerate = samplerate
+        self.max_duration = max_duration
+        self.capacity = int(max_duration * samplerate)
+        self.buffer = np.zeros(self.capacity, dtype=np.float32)
+        self.segment_samples = int(segment_duration * samplerate) if segment_duration else 0
+        self.on_segment = on_segment
+        self.split_samples = min(int(split_window * samplerate), self.segment_samples // 2)
+        self.recording = False
+        self.position = 0
+        self.segment_start = 0
+        self.dropped = 0
+        self._segments = None
+        self._worker = None
+        self._lock = threading.Lock()
+
+    @property
+    def live(self):
+        return bool(self.segment_samples and self.on_segment)
+
+    @property
+    def duration(self):
+        return self.position / self.samplerate
+
+    @property
+    def is_full(self):
+        return self.position >= self.capacity
+
+    def start(self):
+        """Reset the buffer and, in live mode, start the segment worker."""
+        self.stop()
+        with self._lock:
+            self.position = 0
+            self.segment_start = 0
+            self.dropped = 0
+            if self.live:
+                self._segments = queue.Queue()
+                self._worker = threading.Thread(target=self._run_worker, daemon=True)
+                self._worker.start()
+            self.recording = True
+
+    def write(self, samples):
+        """Copy a chunk into the buffer. Signed integer PCM is scaled to [-1, 1).
+
+        Returns:
+            int: Number of samples stored.
+
+        Raises:
+            ValueError: If the samples are neither float nor signed integer.
+        """
+        samples = np.ravel(samples)
+        if not np.issubdtype(samples.dtype, np.floating) and not np.issubdtype(samples.dtype, np.signedinteger):
+            raise ValueError(f"Unsupported sample dtype: {samples.dtype}")
+        with self._lock:
+            return self._write(samples)
+
+    def _write(self, samples):
+        if not self.recording:
+            return 0
+        count = min(len(samples), self.capacity - self.position)
+        self.dropped += len(samples) - count
+        if count:
+            out = self.buffer[self.position:self.position + count]
+            if np.issubdtype(samples.dtype, np.signedinteger):
+                scale = 1.0 / -np.iinfo(samples.dtype).min
+                np.multiply(samples[:count], scale, out=out, casting="unsafe")
+            else:
+                out[:] = samples[:count]
+            self.position += count
+            self._queue_segments()
+        return count
+
+    def stop(self):
+        """Stop accepting writes, flush the last partial segment and wait for the worker."""
+        with self._lock:
+            self.recording = False
+            if self._worker is None:
+                return
+            self._queue_segments(final=True)
+            self._segments.put(None)
+        self._worker.join()
+        self._worker = None
+        self._segments = None
+
+    def get_audio(self):
+        """Return a view of the recorded samples, valid until the next `start()`."""
+        return self.buffer[:self.position]
+
+    def _queue_segments(self, final=False):
+        if self._segments is None:
+            return
+        while self.position - self.segment_start >= self.segment_samples:
+            end = self._find_split(self.segment_start + self.segment_samples)
+            self._segments.put(self.buffer[self.segment_start:end])
+            self.segment_start = end
+        if final and self.position > self.segment_start:
+            self._segments.put(self.buffer[self.segment_start:self.position])
+            self.segment_start = self.position
+
+    def _find_split(self, end):
+        # Middle of the lowest-energy 20 ms frame in the window ending at `end`
+        frame = max(self.samplerate // 50, 1)
+        frames = self.split_samples // frame
+        if frames < 2:
+            return end
+        start = end - frames * frame
+        window = self.buffer[start:end].reshape(frames, frame)
+        quietest = int(np.argmin(np.einsum("ij,ij->i", window, window)))
+        return start + quietest * frame + frame // 2
+
+    def _run_worker(self):
+        while True:
+            segment = self._segments.get()
+            if segment is None:
+                return
+            try:
+                self.on_segment(segment)
+            except Exception as e:
+                print(f"❌ Error while processing segment: {e}")
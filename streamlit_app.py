@@ -1,10 +1,11 @@
-import soundfile as sf
-import numpy as np
 import tempfile
+import threading
 import sys
 import os
 import streamlit as st
 
+from recorder import AudioRecorder
+
 # MUST be first Streamlit command
 st.set_page_config(page_title="Whisper STT", layout="centered")
 
@@ -25,6 +26,7 @@ except ImportError as e:
 # Try to import webrtc with fallback
 try:
     from streamlit_webrtc import webrtc_streamer, AudioProcessorBase, WebRtcMode, RTCConfiguration, RTCIceServer
+    import av
     WEBRTC_AVAILABLE = True
 except ImportError:
     WEBRTC_AVAILABLE = False
@@ -111,39 +113,90 @@ elif mode == "Microphone (WebRTC)" and WEBRTC_AVAILABLE:
         ]
     })
 
+    MAX_RECORDING_SECONDS = 300
+    LIVE_SEGMENT_SECONDS = 5
+
     class AudioProcessor(AudioProcessorBase):
         def __init__(self) -> None:
-            self.recorded_frames = []
-            self.is_recording = False
+            # Preallocated once per connection and reused for every recording
+            self.recorder = AudioRecorder(samplerate=16000, max_duration=MAX_RECORDING_SECONDS,
+                                          segment_duration=LIVE_SEGMENT_SECONDS)
+            self.resampler = None
+            self.live_texts = []
+            self.texts_lock = threading.Lock()
 
         def recv_queued(self, frames):
             # Process multiple frames at once (more efficient)
-            if self.is_recording:
+            if self.recorder.recording:
                 for frame in frames:
-                    self.recorded_frames.append(frame.to_ndarray().flatten())
+                    # Browsers send 48 kHz stereo Opus whatever the constraints ask for
+                    for resampled in self.resampler.resample(frame):
+                        self.recorder.write(resampled.to_ndarray())
             return frames
 
-        def start_recording(self):
-            self.is_recording = True
-            self.recorded_frames = []
+        def start_recording(self, live=False):
+            with self.texts_lock:
+                self.live_texts = []
+            self.resampler = av.AudioResampler(format="flt", layout="mono", rate=16000)
+            self.recorder.on_segment = self.transcribe_segment if live else None
+            self.recorder.start()
             st.session_state.recording_active = True
             st.session_state.has_audio_data = False
+            st.session_state.live_text = None
+
+        def transcript(self):
+            with self.texts_lock:
+                return " ".join(self.live_texts)
+
+        def transcribe_segment(self, segment):
+            # Runs on the recorder's worker thread while recording continues
+            text = model.transcribe(segment, fp16=False,
+                                    initial_prompt=self.transcript() or None)["text"].strip()
+            if text:
+                with self.texts_lock:
+                    self.live_texts.append(text)
 
         def stop_recording(self):
-            self.is_recording = False
+            # Rejects further writes and waits for segments still queued for live transcription
+            self.recorder.stop()
             st.session_state.recording_active = False
-            if self.recorded_frames:
-                st.session_state.audio_frames = self.recorded_frames.copy()
+            if self.recorder.live:
+                st.session_state.live_text = self.transcript()
+            elif self.recorder.position:
+                st.session_state.recorded_audio = self.recorder.get_audio()
                 st.session_state.has_audio_data = True
-            return self.recorded_frames
+            return self.recorder.get_audio()
+
+        def on_ended(self):
+            # Called on disconnect; releases the live transcription worker
+            self.recorder.stop()
+
+    @st.fragment(run_every=1)
+    def show_recording_status(processor):
+        # Refreshes on its own so the progress bar and live transcript keep updating
+        recorder = processor.recorder
+        if recorder.is_full:
+            st.error(
+                f"⏱️ **Maximum length of {MAX_RECORDING_SECONDS} seconds reached.** Click 'Stop Recording'.")
+        else:
+            st.warning(
+                "🎙️ **Recording in progress...** Speak now, then click 'Stop Recording' when done.")
+        # Show how much of the recording buffer is used
+        st.progress(min(recorder.position / recorder.capacity, 1.0),
+                    text=f"🔴 Recording... {recorder.duration:.0f}s / {MAX_RECORDING_SECONDS}s")
+        transcript = processor.transcript()
+        if recorder.live and transcript:
+            st.text_area("📝 Transcribed so far", transcript, height=150)
 
     # Initialize session state
     if 'recording_active' not in st.session_state:
         st.session_state.recording_active = False
     if 'has_audio_data' not in st.session_state:
         st.session_state.has_audio_data = False
-    if 'audio_frames' not in st.session_state:
-        st.session_state.audio_frames = []
+    if 'recorded_audio' not in st.session_state:
+        st.session_state.recorded_audio = None
+    if 'live_text' not in st.session_state:
+        st.session_state.live_text = None
 
     try:
         ctx = webrtc_streamer(
@@ -172,26 +225,42 @@ elif mode == "Microphone (WebRTC)" and WEBRTC_AVAILABLE:
         else:
             st.info("🔴 Click 'START' above to connect microphone")
 
+        # The connection ended while recording; keep whatever was recorded
+        if st.session_state.recording_active and not (ctx.audio_processor and ctx.state.playing):
+            if ctx.audio_processor:
+                ctx.audio_processor.stop_recording()
+            else:
+                st.session_state.recording_active = False
+
         # Recording control buttons
         if ctx.audio_processor:
+            live = st.checkbox(
+                "⚡ Transcribe while recording", disabled=st.session_state.recording_active,
+                help=f"Transcribes every {LIVE_SEGMENT_SECONDS} seconds of audio while you keep speaking.")
+
             col1, col2 = st.columns(2)
 
             with col1:
                 if st.button("🎙️ Start Recording", disabled=st.session_state.recording_active):
-                    ctx.audio_processor.start_recording()
+                    ctx.audio_processor.start_recording(live=live)
                     st.rerun()
 
             with col2:
                 if st.button("⏹️ Stop Recording", disabled=not st.session_state.recording_active):
-                    ctx.audio_processor.stop_recording()
+                    with st.spinner("🔁 Finishing transcription..."):
+                        ctx.audio_processor.stop_recording()
                     st.rerun()
 
             # Show current recording status
             if st.session_state.recording_active:
-                st.warning(
-                    "🎙️ **Recording in progress...** Speak now, then click 'Stop Recording' when done.")
-                # Show a simple audio level indicator
-                st.progress(50, text="🔴 Recording...")
+                show_recording_status(ctx.audio_processor)
+
+            # Show live transcription once recording has stopped
+            if st.session_state.live_text is not None and not st.session_state.recording_active:
+                st.success("✅ Transcription complete!")
+                st.subheader("📝 Transcribed Text")
+                st.text_area("", st.session_state.live_text,
+                             height=200, label_visibility="collapsed")
 
             # Show transcribe button only when we have audio data
             if st.session_state.has_audio_data and not st.session_state.recording_active:
@@ -199,55 +268,40 @@ elif mode == "Microphone (WebRTC)" and WEBRTC_AVAILABLE:
                     "✅ **Recording complete!** Click below to transcribe.")
 
                 if st.button("📝 Transcribe Recorded Audio", type="primary"):
-                    if st.session_state.audio_frames:
+                    if st.session_state.recorded_audio is not None:
                         with st.spinner("🔁 Processing audio... Please wait."):
                             try:
-                                # Combine all audio frames
-                                audio_data = np.concatenate(
-                                    st.session_state.audio_frames, axis=0)
-
-                                # Save to temporary file
-                                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-                                    import soundfile as sf
-                                    sf.write(tmp_file.name, audio_data, 16000)
-
-                                    # Transcribe
-                                    result = model.transcribe(
-                                        tmp_file.name, fp16=False)
-
-                                    # Display results
-                                    st.success("✅ Transcription complete!")
-                                    st.subheader("📝 Transcribed Text")
-                                    st.text_area(
-                                        "", result["text"], height=200, label_visibility="collapsed")
-
-                                    # Additional info
-                                    with st.expander("📊 Additional Information"):
+                                # Transcribe the recorded float32 samples directly
+                                result = model.transcribe(
+                                    st.session_state.recorded_audio, fp16=False)
+
+                                # Display results
+                                st.success("✅ Transcription complete!")
+                                st.subheader("📝 Transcribed Text")
+                                st.text_area(
+                                    "", result["text"], height=200, label_visibility="collapsed")
+
+                                # Additional info
+                                with st.expander("📊 Additional Information"):
+                                    st.write(
+                                        f"**Language detected:** {result.get('language', 'Unknown')}")
+                                    if 'segments' in result:
+                                        st.write(
+                                            f"**Number of segments:** {len(result['segments'])}")
+                                        duration = result['segments'][-1].get(
+                                            'end', 0) if result['segments'] else 0
                                         st.write(
-                                            f"**Language detected:** {result.get('language', 'Unknown')}")
-                                        if 'segments' in result:
-                                            st.write(
-                                                f"**Number of segments:** {len(result['segments'])}")
-                                            duration = result['segments'][-1].get(
-                                                'end', 0) if result['segments'] else 0
-                                            st.write(
-                                                f"**Duration:** {duration:.1f} seconds")
-
-                                    # Reset for next recording
-                                    st.session_state.has_audio_data = False
-                                    st.session_state.audio_frames = []
+                                            f"**Duration:** {duration:.1f} seconds")
+
+                                # Reset for next recording
+                                st.session_state.has_audio_data = False
+                                st.session_state.recorded_audio = None
 
                             except Exception as e:
                                 st.error(
                                     f"❌ Error during transcription: {str(e)}")
                                 st.info(
                                     "Try recording again or use the file upload method.")
-
-                            finally:
-                                try:
-                                    os.unlink(tmp_file.name)
-                                except:
-                                    pass
                     else:
                         st.error("No audio data found. Please record again.")
                         st.session_state.has_audio_data = False
@@ -1,23 +1,43 @@
+import threading
+
 import sounddevice as sd
 import whisper
 import numpy as np
 
+from recorder import AudioRecorder
+
+
+def record_audio_array(max_duration=30, samplerate=16000, segment_duration=None, on_segment=None,
+                       stop_event=None):
+    # Recording ends when `stop_event` is set or `max_duration` is reached
+    recorder = AudioRecorder(samplerate=samplerate, max_duration=max_duration,
+                             segment_duration=segment_duration, on_segment=on_segment)
+    done = stop_event if stop_event is not None else threading.Event()
+
+    def callback(indata, frames, time, status):
+        if status:
+            print(f"⚠️  {status}")
+        recorder.write(indata)
+        if recorder.is_full:
+            done.set()
+            raise sd.CallbackStop()
 
-def record_audio_array(duration=5, samplerate=16000):
-    print(f"🎙️  Recording for {duration} seconds... Speak now!")
-    audio = sd.rec(int(duration * samplerate),
-                   samplerate=samplerate, channels=1, dtype='float32')
-    sd.wait()
-    print("✅ Recording complete.\n")
-    return np.squeeze(audio)  # Convert shape (N, 1) → (N,)
+    print(f"🎙️  Recording (max {max_duration} seconds)... Speak now!")
+    recorder.start()
+    with sd.InputStream(samplerate=samplerate, channels=1, dtype='float32', callback=callback):
+        done.wait()
+    recorder.stop()
+    print(f"✅ Recording complete ({recorder.duration:.1f} seconds).\n")
+    return recorder.get_audio()
 
 
-def transcribe_audio_array(audio_array, model_size="base"):
-    print(f"📦 Loading Whisper model: {model_size}")
-    model = whisper.load_model(model_size)
+def transcribe_audio_array(audio_array, model_size="base", model=None):
+    if model is None:
+        print(f"📦 Loading Whisper model: {model_size}")
+        model = whisper.load_model(model_size)
 
-    # Pad or trim to match Whisper input expectations
-    audio_array = whisper.pad_or_trim(audio_array)
+    # Whisper expects float32; transcribe() handles audio longer than 30 seconds itself
+    audio_array = np.asarray(audio_array, dtype=np.float32)
 
     print("🧠 Transcribing...")
     result = model.transcribe(audio_array, fp16=False)
@@ -26,11 +46,33 @@ def transcribe_audio_array(audio_array, model_size="base"):
 
 
 if __name__ == "__main__":
-    duration = 5  # You can customize this
-    print("🎧 Press Enter to start recording...")
+    max_duration = 30  # You can customize this
+    live = False  # Transcribe 5-second segments while recording continues
+    print("📦 Loading Whisper model: base")
+    model = whisper.load_model("base")
+
+    print("🎧 Press Enter to start recording, and again to stop...")
     input()  # Wait for user input
 
-    audio = record_audio_array(duration=duration)
-    text = transcribe_audio_array(audio, model_size="base")
+    stop_event = threading.Event()
+    threading.Thread(target=lambda: (input(), stop_event.set()), daemon=True).start()
+
+    if live:
+        texts = []
+
+        def transcribe_segment(segment):
+            # The previous text gives Whisper context across segment boundaries
+            text = model.transcribe(segment, fp16=False,
+                                    initial_prompt=" ".join(texts) or None)["text"].strip()
+            if text:
+                texts.append(text)
+                print("📝", text)
+
+        record_audio_array(max_duration=max_duration, segment_duration=5,
+                           on_segment=transcribe_segment, stop_event=stop_event)
+        text = " ".join(texts)
+    else:
+        audio = record_audio_array(max_duration=max_duration, stop_event=stop_event)
+        text = transcribe_audio_array(audio, model=model)
 
     print("📝 Transcribed Text:\n", text)